@@ -1,42 +1,111 @@
 import argparse
+import copy
+import csv
+import functools
+import math
+import multiprocessing
 import os
-from dataclasses import dataclass
+import re
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-import pandas as pd
+import numpy as np
 import yaml
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:
+    import chardet
+except ImportError:  # optional: fall back to trying each encoding in turn
+    chardet = None
+
+try:
+    import ahocorasick
+except ImportError:  # optional: fall back to per-keyword str.contains
+    ahocorasick = None
+
+# Prefer the libyaml-backed loader when PyYAML was built with it.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# path -> (mtime_ns, size, data); callers get deep copies so they may mutate freely.
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, object]]" = OrderedDict()
+_YAML_CACHE_MAX = 100
+
 
 def mm_to_pt(value: float) -> float:
     """Convert millimeters to points."""
     return value * mm
 
 
+# Voucher drawing metrics, already in points.
+VOUCHER_PADDING = 8
+VOUCHER_LINE_HEIGHT = 14
+
+DEFAULT_MARGIN_MM = 15
+DEFAULT_SPACING_MM = 8
+
+
 @dataclass
-class Voucher:
-    number: str
-    date: datetime
-    description: str
-    debit_account: str
-    credit_account: str
-    amount: float
+class VoucherBatch:
+    """Vouchers stored column-wise: row i of every array is one voucher."""
+
+    numbers: np.ndarray
+    dates: np.ndarray
+    descriptions: np.ndarray
+    debit_accounts: np.ndarray
+    credit_accounts: np.ndarray
+    amount_cents: np.ndarray
+    formatted_dates: np.ndarray
+    formatted_amounts: np.ndarray
+
+    @classmethod
+    def from_columns(cls, numbers, dates, descriptions, debit_accounts, credit_accounts, amount_cents) -> "VoucherBatch":
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        amount_cents = np.asarray(amount_cents, dtype=np.int64)
+        # Formatted once per voucher and reused by every amount cell drawn.
+        yuan, cents = np.divmod(amount_cents, 100)
+        iso_dates = np.datetime_as_string(dates, unit="D").tolist()
+        return cls(
+            numbers=np.asarray(numbers, dtype=object),
+            dates=dates,
+            descriptions=np.asarray(descriptions, dtype=object),
+            debit_accounts=np.asarray(debit_accounts, dtype=object),
+            credit_accounts=np.asarray(credit_accounts, dtype=object),
+            amount_cents=amount_cents,
+            formatted_dates=np.array([f"{d[:4]}年{d[5:7]}月{d[8:10]}日" for d in iso_dates], dtype=object),
+            formatted_amounts=np.array([f"{y:,}.{c:02d}" for y, c in zip(yuan.tolist(), cents.tolist())], dtype=object),
+        )
 
-    @property
-    def formatted_date(self) -> str:
-        return self.date.strftime("%Y年%m月%d日")
+    def __len__(self) -> int:
+        return len(self.numbers)
 
-    @property
-    def formatted_amount(self) -> str:
-        return f"{self.amount:,.2f}"
+    def __getitem__(self, index: slice) -> "VoucherBatch":
+        return VoucherBatch(**{f.name: getattr(self, f.name)[index] for f in fields(self)})
 
 
 def load_yaml_file(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(cached[2])
+
+    with open(key, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=_YAML_LOADER) or {}
+    _YAML_CACHE[key] = (stat.st_mtime_ns, stat.st_size, data)
+    _YAML_CACHE.move_to_end(key)
+    if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+        _YAML_CACHE.popitem(last=False)
+    return copy.deepcopy(data)
 
 
 def load_config(path: str) -> dict:
@@ -54,74 +123,227 @@ def load_mapping(path: str) -> list:
     return data
 
 
-def try_read_csv(csv_path: str) -> pd.DataFrame:
-    encodings = ["utf-8", "gbk", "gb2312"]
+CSV_ENCODINGS = ("utf-8", "gbk", "gb2312")
+
+COLUMN_ALIASES = {
+    "date": ["日期", "交易日期", "记账日期", "发生日期"],
+    "summary": ["摘要", "附言", "用途", "说明"],
+    "debit": ["借方金额", "借方", "收入"],
+    "credit": ["贷方金额", "贷方", "支出"],
+}
+
+
+def detect_encoding(csv_path: str, sample_size: int = 64 * 1024) -> Optional[str]:
+    """Guess the CSV encoding from a bounded sample; None when chardet is missing or unsure."""
+    if chardet is None:
+        return None
+    with open(csv_path, "rb") as f:
+        result = chardet.detect(f.read(sample_size))
+    encoding = (result.get("encoding") or "").lower()
+    if encoding == "ascii":
+        encoding = "utf-8"
+    if result.get("confidence", 0) > 0.9 and encoding in CSV_ENCODINGS:
+        return encoding
+    return None
+
+
+# alias -> (logical column, position in its alias list); a lower position wins when several aliases appear.
+_COLUMN_LOOKUP = {
+    alias: (logical, rank)
+    for logical, aliases in COLUMN_ALIASES.items()
+    for rank, alias in enumerate(aliases)
+}
+
+
+def find_csv_columns(columns) -> Dict[str, Optional[str]]:
+    """Map each logical column to the raw CSV header that carries it (headers compare stripped)."""
+    found: Dict[str, Optional[str]] = {logical: None for logical in COLUMN_ALIASES}
+    found_rank: Dict[str, int] = {}
+    for column in columns:
+        hit = _COLUMN_LOOKUP.get(str(column).strip())
+        if hit is None:
+            continue
+        logical, rank = hit
+        if rank < found_rank.get(logical, len(COLUMN_ALIASES[logical])):
+            found[logical] = column
+            found_rank[logical] = rank
+    return found
+
+
+def _candidate_encodings(csv_path: str) -> List[str]:
+    detected = detect_encoding(csv_path)
+    encodings = list(CSV_ENCODINGS)
+    if detected:
+        encodings.remove(detected)
+        encodings.insert(0, detected)
+    return encodings
+
+
+def _has_required_columns(columns: Dict[str, Optional[str]]) -> bool:
+    return bool(columns["date"] and columns["summary"] and (columns["debit"] or columns["credit"]))
+
+
+DATE_FORMATS = ("%Y/%m/%d", "%Y-%m-%d", "%Y.%m.%d", "%Y%m%d")
+
+
+# Matches every DATE_FORMATS layout: one separator (or none) used consistently between year, month and day,
+# optionally followed by a time of day as bank exports often append ("2024/01/05 10:30"); only the date is kept.
+_DATE_RE = re.compile(r"(\d{4})([-/.]?)(\d{1,2})\2(\d{1,2})(?:[ T]\d{1,2}:\d{2}(?::\d{2})?)?")
+
+
+def parse_date(value: str) -> datetime:
+    value = value.strip()
+    if not value:
+        raise ValueError("日期为空")
+    match = _DATE_RE.fullmatch(value)
+    try:
+        if match:
+            return datetime(int(match[1]), int(match[3]), int(match[4]))
+        # Let pandas try its best on other layouts; importing it here keeps it off the normal start-up path.
+        import pandas as pd
+
+        parsed = pd.to_datetime(value)
+    except ValueError:
+        raise ValueError(f"无法解析日期：{value}") from None
+    if pd.isna(parsed):
+        raise ValueError(f"无法解析日期：{value}")
+    return parsed.to_pydatetime()
+
+
+def parse_amount(value: str) -> float:
+    # float() also accepts Python literal forms such as "1_000", which pandas reads as text.
+    if "_" in value:
+        return 0.0
+    try:
+        amount = float(value)
+    except ValueError:
+        return 0.0
+    # NaN and infinities ("inf", "1e400") are treated like an empty cell.
+    return amount if math.isfinite(amount) else 0.0
+
+
+def read_csv_rows(csv_path: str) -> Tuple[List[List[str]], Dict[str, Optional[str]]]:
+    """Return the non-empty rows and the resolved header columns."""
     errors = []
-    for enc in encodings:
+    missing_columns = False
+    for enc in _candidate_encodings(csv_path):
         try:
-            return pd.read_csv(csv_path, encoding=enc)
+            # utf-8-sig also accepts files saved with a BOM, as Excel exports often are.
+            with open(csv_path, "r", encoding="utf-8-sig" if enc == "utf-8" else enc, newline="") as f:
+                rows = [row for row in csv.reader(f) if row]
         except UnicodeDecodeError as exc:
             errors.append(str(exc))
+            continue
+        columns = find_csv_columns(rows[0]) if rows else None
+        if not columns or not _has_required_columns(columns):
+            # A wrong encoding can decode the header into garbage instead of failing; try the next one.
+            missing_columns = True
+            continue
+        return rows, columns
+    if missing_columns:
+        raise ValueError("CSV 缺少必要的列：日期/摘要/借方或贷方金额")
     raise UnicodeDecodeError(
         "无法读取 CSV", "", 0, 0, f"尝试的编码失败：{' | '.join(errors)}"
     )
 
 
-def parse_csv(csv_path: str, filter_zero: bool = True) -> pd.DataFrame:
-    df = try_read_csv(csv_path)
-    df.columns = [c.strip() for c in df.columns]
+def parse_csv(csv_path: str, filter_zero: bool = True) -> Dict[str, list]:
+    """Read the statement with the stdlib csv module into parallel column lists
+    (date, summary and whichever of debit/credit exist)."""
+    rows, columns = read_csv_rows(csv_path)
+    header, body = rows[0], rows[1:]
+    positions = {logical: header.index(col) for logical, col in columns.items() if col}
 
-    column_aliases = {
-        "date": ["日期", "交易日期", "记账日期", "发生日期"],
-        "summary": ["摘要", "附言", "用途", "说明"],
-        "debit": ["借方金额", "借方", "收入"],
-        "credit": ["贷方金额", "贷方", "支出"],
+    def column(logical: str) -> List[str]:
+        pos = positions[logical]
+        return [row[pos] if pos < len(row) else "" for row in body]
+
+    table: Dict[str, list] = {
+        "date": [parse_date(value) for value in column("date")],
+        "summary": [value.strip() for value in column("summary")],
     }
+    for logical in ("debit", "credit"):
+        if logical in positions:
+            table[logical] = [parse_amount(value) for value in column(logical)]
 
-    def find_column(possible_names: List[str]) -> Optional[str]:
-        for name in possible_names:
-            if name in df.columns:
-                return name
-        return None
+    if filter_zero:
+        keep = [
+            i for i in range(len(body))
+            if any(table[logical][i] != 0 for logical in ("debit", "credit") if logical in table)
+        ]
+        table = {name: [values[i] for i in keep] for name, values in table.items()}
 
-    date_col = find_column(column_aliases["date"])
-    summary_col = find_column(column_aliases["summary"])
-    debit_col = find_column(column_aliases["debit"])
-    credit_col = find_column(column_aliases["credit"])
+    return table
 
-    if not date_col or not summary_col or not (debit_col or credit_col):
-        raise ValueError("CSV 缺少必要的列：日期/摘要/借方或贷方金额")
 
-    df = df[[col for col in [date_col, summary_col, debit_col, credit_col] if col]]
-    df = df.rename(
-        columns={
-            date_col: "date",
-            summary_col: "summary",
-            debit_col: "debit" if debit_col else "debit_missing",
-            credit_col: "credit" if credit_col else "credit_missing",
-        }
-    )
+def try_read_csv(csv_path: str) -> "pd.DataFrame":
+    import pandas as pd
 
-    def parse_date(value) -> datetime:
-        if pd.isna(value):
-            raise ValueError("日期为空")
-        if isinstance(value, datetime):
-            return value
-        for fmt in ("%Y/%m/%d", "%Y-%m-%d", "%Y.%m.%d", "%Y%m%d"):
-            try:
-                return datetime.strptime(str(value).strip(), fmt)
-            except ValueError:
+    errors = []
+    missing_columns = False
+    for enc in _candidate_encodings(csv_path):
+        try:
+            # Resolve the columns from the header alone so the full read only parses what is used.
+            header = pd.read_csv(csv_path, encoding=enc, nrows=0).columns
+            columns = find_csv_columns(header)
+            if not _has_required_columns(columns):
+                # A wrong encoding can decode the header into garbage instead of failing; try the next one.
+                missing_columns = True
                 continue
-        # Let pandas try its best
-        return pd.to_datetime(value)
+            df = pd.read_csv(
+                csv_path,
+                encoding=enc,
+                engine="c",
+                usecols=[col for col in columns.values() if col],
+                dtype={columns["date"]: str, columns["summary"]: str},
+            )
+        except UnicodeDecodeError as exc:
+            errors.append(str(exc))
+            continue
+        found = {logical: col for logical, col in columns.items() if col}
+        return df[list(found.values())].rename(columns={col: logical for logical, col in found.items()})
+    if missing_columns:
+        raise ValueError("CSV 缺少必要的列：日期/摘要/借方或贷方金额")
+    raise UnicodeDecodeError(
+        "无法读取 CSV", "", 0, 0, f"尝试的编码失败：{' | '.join(errors)}"
+    )
+
 
-    df["date"] = df["date"].apply(parse_date)
+def parse_csv_pandas(csv_path: str, filter_zero: bool = True) -> "pd.DataFrame":
+    import pandas as pd
+
+    df = try_read_csv(csv_path)
+
+    def parse_dates(values: pd.Series) -> pd.Series:
+        if values.isna().any():
+            raise ValueError("日期为空")
+        text = values.astype(str).str.strip()
+        if (text == "").any():
+            raise ValueError("日期为空")
+        parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+        for fmt in DATE_FORMATS:
+            missing = parsed.isna()
+            if not missing.any():
+                break
+            parsed = parsed.fillna(pd.to_datetime(text[missing], format=fmt, errors="coerce"))
+        missing = parsed.isna()
+        if missing.any():
+            # Let pandas try its best; unparseable dates still raise
+            parsed[missing] = pd.to_datetime(text[missing], format="mixed")
+        missing = parsed.isna()
+        if missing.any():
+            raise ValueError(f"无法解析日期：{text[missing].iloc[0]}")
+        return parsed
+
+    df["date"] = parse_dates(df["date"])
     df["summary"] = df["summary"].fillna("").astype(str)
+    df["summary"] = df["summary"].str.strip()
 
+    # Unreadable and non-finite ("inf", "1e400") amounts both count as empty cells.
     if "debit" in df.columns:
-        df["debit"] = pd.to_numeric(df["debit"], errors="coerce").fillna(0.0)
+        df["debit"] = pd.to_numeric(df["debit"], errors="coerce").replace([np.inf, -np.inf], np.nan).fillna(0.0)
     if "credit" in df.columns:
-        df["credit"] = pd.to_numeric(df["credit"], errors="coerce").fillna(0.0)
+        df["credit"] = pd.to_numeric(df["credit"], errors="coerce").replace([np.inf, -np.inf], np.nan).fillna(0.0)
 
     if filter_zero:
         df = df[(df.get("debit", 0) != 0) | (df.get("credit", 0) != 0)]
@@ -129,115 +351,278 @@ def parse_csv(csv_path: str, filter_zero: bool = True) -> pd.DataFrame:
     return df
 
 
-def map_entry_to_accounts(summary: str, mapping_rules: list, fallback_debit: str, fallback_credit: str) -> Tuple[str, str]:
-    for rule in mapping_rules:
-        keyword = rule.get("keyword")
-        if keyword and keyword in summary:
-            return rule.get("debit_account", fallback_debit), rule.get(
-                "credit_account", fallback_credit
-            )
-    return fallback_debit, fallback_credit
-
-
-def build_vouchers(df: pd.DataFrame, mapping_rules: list, start_number: int, fallback_debit: str, fallback_credit: str) -> List[Voucher]:
-    vouchers: List[Voucher] = []
-    for idx, row in df.iterrows():
-        amount = row.get("debit", 0.0)
-        amount_field = "debit"
-        if amount == 0:
-            amount = row.get("credit", 0.0)
-            amount_field = "credit"
-        if amount == 0:
-            continue
+MappingRule = Tuple[str, str, str]
 
-        debit_account, credit_account = map_entry_to_accounts(
-            row.get("summary", ""), mapping_rules, fallback_debit, fallback_credit
-        )
 
-        description = row.get("summary", "").strip() or "银行流水"
-        number = f"{start_number + len(vouchers):03d}"
-        vouchers.append(
-            Voucher(
-                number=number,
-                date=row.get("date"),
-                description=description,
-                debit_account=debit_account,
-                credit_account=credit_account,
-                amount=float(abs(amount)),
-            )
+def compile_mapping_rules(mapping_rules: list, fallback_debit: str, fallback_credit: str) -> List[MappingRule]:
+    """Flatten mapping.yaml entries into (keyword, debit, credit) tuples, dropping rules without a keyword."""
+    return [
+        (rule["keyword"], rule.get("debit_account", fallback_debit), rule.get("credit_account", fallback_credit))
+        for rule in mapping_rules
+        if rule.get("keyword")
+    ]
+
+
+# Rule count from which the compiled scan pays for itself over the pure-Python matchers.
+NUMBA_MIN_RULES = 64
+
+
+def _encode_strings(values) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into one uint32 code point array plus start offsets (len(values) + 1 entries)."""
+    values = list(values)
+    offsets = np.zeros(len(values) + 1, dtype=np.intp)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    chars = np.frombuffer("".join(values).encode("utf-32-le"), dtype=np.uint32)
+    return chars, offsets
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_first_rule():
+    """Compile the keyword-scan kernel on first use; None when numba is not installed.
+
+    numba is imported here rather than at module level so runs that never need it skip its import time.
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+
+    @numba.njit(parallel=True, cache=True)
+    def _first_rule_numba(text, text_offsets, kw_chars, kw_offsets):
+        n = len(text_offsets) - 1
+        result = np.full(n, -1, dtype=np.intp)
+        for row in numba.prange(n):
+            start, end = text_offsets[row], text_offsets[row + 1]
+            for rule in range(len(kw_offsets) - 1):
+                kw_start = kw_offsets[rule]
+                kw_len = kw_offsets[rule + 1] - kw_start
+                found = False
+                for pos in range(start, end - kw_len + 1):
+                    j = 0
+                    while j < kw_len and text[pos + j] == kw_chars[kw_start + j]:
+                        j += 1
+                    if j == kw_len:
+                        found = True
+                        break
+                if found:
+                    result[row] = rule
+                    break
+        return result
+
+    return _first_rule_numba
+
+
+def match_rule_indices(summaries: Sequence[str], rules: List[MappingRule]) -> np.ndarray:
+    """Return the index of the first rule whose keyword occurs in each summary, or -1."""
+    if not rules:
+        return np.full(len(summaries), -1, dtype=np.intp)
+
+    if len(rules) >= NUMBA_MIN_RULES and _numba_first_rule() is not None:
+        text, text_offsets = _encode_strings(summaries)
+        kw_chars, kw_offsets = _encode_strings(keyword for keyword, _, _ in rules)
+        return _numba_first_rule()(text, text_offsets, kw_chars, kw_offsets)
+
+    if ahocorasick is None:
+        # np.select picks the first matching condition, preserving rule order.
+        matches = [
+            np.fromiter((keyword in summary for summary in summaries), dtype=bool, count=len(summaries))
+            for keyword, _, _ in rules
+        ]
+        return np.select(matches, np.arange(len(rules)), -1)
+
+    automaton = ahocorasick.Automaton()
+    for i, (keyword, _, _) in enumerate(rules):
+        if not automaton.exists(keyword):
+            automaton.add_word(keyword, i)
+    automaton.make_automaton()
+    # A single scan finds every keyword hit; the lowest rule index wins, as in the rule list order.
+    return np.fromiter(
+        (min((i for _, i in automaton.iter(summary)), default=-1) for summary in summaries),
+        dtype=np.intp,
+        count=len(summaries),
+    )
+
+
+def resolve_accounts(rule_idx: np.ndarray, rules: List[MappingRule], fallback_debit: str, fallback_credit: str) -> Tuple[List[str], List[str]]:
+    """Turn per-row rule indices into debit/credit account lists with one table lookup per column."""
+    # Index -1 (no match) lands on the trailing fallback entry.
+    debit_table = np.array([d for _, d, _ in rules] + [fallback_debit], dtype=object)
+    credit_table = np.array([c for _, _, c in rules] + [fallback_credit], dtype=object)
+    return debit_table.take(rule_idx).tolist(), credit_table.take(rule_idx).tolist()
+
+
+def amounts_to_cents(amounts: np.ndarray) -> np.ndarray:
+    """Round float amounts to integer cents exactly as "%.2f" prints them.
+
+    That is round-half-even on the float's true binary value, the rule the vouchers have always
+    printed with (2.675 -> 2.67), rather than rounding the inexact product amount * 100.
+    """
+    cents = [int(f"{amount:.2f}".replace(".", "")) for amount in amounts.tolist()]
+    if cents and max(cents) > np.iinfo(np.int64).max:
+        raise ValueError(f"金额超出可处理范围：{max(cents) / 100:,.2f}")
+    return np.array(cents, dtype=np.int64)
+
+
+def build_vouchers(table, rules: List[MappingRule], start_number: int, fallback_debit: str, fallback_credit: str) -> VoucherBatch:
+    """Build vouchers from parse_csv's column dict or parse_csv_pandas's DataFrame."""
+    n = len(table["date"])
+    debit = np.asarray(table["debit"], dtype=float) if "debit" in table else np.zeros(n)
+    credit = np.asarray(table["credit"], dtype=float) if "credit" in table else np.zeros(n)
+    amount = np.where(debit != 0, debit, credit)
+    keep = amount != 0
+
+    summaries = np.asarray(table["summary"], dtype=object)[keep]
+    debit_accounts, credit_accounts = resolve_accounts(
+        match_rule_indices(summaries, rules), rules, fallback_debit, fallback_credit
+    )
+
+    return VoucherBatch.from_columns(
+        numbers=np.char.mod("%03d", np.arange(start_number, start_number + len(summaries))),
+        dates=np.asarray(table["date"], dtype="datetime64[D]")[keep],
+        descriptions=np.where(summaries != "", summaries, "银行流水"),
+        debit_accounts=debit_accounts,
+        credit_accounts=credit_accounts,
+        amount_cents=amounts_to_cents(np.abs(amount[keep])),
+    )
+
+
+SIGNATURE_LABELS = ("制单", "记账", "审核", "出纳", "复核")
+
+
+@dataclass(frozen=True)
+class _VoucherLayout:
+    """Voucher geometry relative to the voucher's bottom-left corner, shared by every voucher of one size."""
+
+    width: float
+    height: float
+    title_x: float
+    title_y: float
+    left_x: float
+    right_x: float
+    top_y: float
+    date_y: float
+    table_top: float
+    table_bottom: float
+    table_width: float
+    summary_text_x: float
+    account_text_x: float
+    debit_right_x: float
+    credit_right_x: float
+    separator_xs: Tuple[float, float, float]
+    separator_top: float
+    debit_y: float
+    credit_y: float
+    total_y: float
+    footer_y: float
+    footer_xs: Tuple[float, ...]
+
+    @classmethod
+    def for_size(cls, width: float, height: float) -> "_VoucherLayout":
+        padding = VOUCHER_PADDING
+        line_height = VOUCHER_LINE_HEIGHT
+
+        top_y = height - padding - 24
+        table_top = top_y - line_height * 2 - 6
+        table_left = padding
+        table_width = width - 2 * padding
+        summary_width = table_width * 0.28
+        account_width = table_width * 0.42
+        amount_width = (table_width - summary_width - account_width) / 2
+        summary_right = table_left + summary_width
+        account_right = summary_right + account_width
+        debit_right = account_right + amount_width
+        debit_y = table_top - line_height
+        credit_y = debit_y - line_height
+        footer_spacing = table_width / len(SIGNATURE_LABELS)
+
+        return cls(
+            width=width,
+            height=height,
+            title_x=width / 2,
+            title_y=height - padding - 6,
+            left_x=padding,
+            right_x=width - padding,
+            top_y=top_y,
+            date_y=top_y - line_height,
+            table_top=table_top,
+            table_bottom=table_top - 3 * line_height - 6,
+            table_width=table_width,
+            summary_text_x=table_left + 4,
+            account_text_x=summary_right + 4,
+            debit_right_x=debit_right - 4,
+            credit_right_x=account_right + 2 * amount_width - 4,
+            separator_xs=(summary_right, account_right, debit_right),
+            separator_top=table_top + 6,
+            debit_y=debit_y,
+            credit_y=credit_y,
+            total_y=credit_y - line_height,
+            footer_y=padding + 4,
+            footer_xs=tuple(table_left + footer_spacing * i for i in range(len(SIGNATURE_LABELS))),
         )
-    return vouchers
 
 
-def draw_voucher(c: canvas.Canvas, voucher: Voucher, x: float, y: float, width: float, height: float, config: dict):
-    c.roundRect(x, y, width, height, 4, stroke=1, fill=0)
-    padding = 8
-    line_height = 14
+def draw_voucher(c: canvas.Canvas, batch: VoucherBatch, i: int, x: float, y: float, layout: _VoucherLayout, config: dict):
+    formatted_amount = batch.formatted_amounts[i]
+    c.roundRect(x, y, layout.width, layout.height, 4, stroke=1, fill=0)
 
     # Header
     c.setFont("Helvetica-Bold", 14)
-    c.drawCentredString(x + width / 2, y + height - padding - 6, config.get("company_name", "公司名称"))
+    c.drawCentredString(x + layout.title_x, y + layout.title_y, config.get("company_name", "公司名称"))
 
     c.setFont("Helvetica", 10)
-    top_y = y + height - padding - 24
-    c.drawString(x + padding, top_y, f"凭证字：记字")
-    c.drawRightString(x + width - padding, top_y, f"凭证号：{voucher.number}")
-    c.drawString(x + padding, top_y - line_height, f"日期：{voucher.formatted_date}")
+    top_y = y + layout.top_y
+    c.drawString(x + layout.left_x, top_y, f"凭证字：记字")
+    c.drawRightString(x + layout.right_x, top_y, f"凭证号：{batch.numbers[i]}")
+    c.drawString(x + layout.left_x, y + layout.date_y, f"日期：{batch.formatted_dates[i]}")
 
     # Table headers
-    table_top = top_y - line_height * 2 - 6
-    table_left = x + padding
-    table_width = width - 2 * padding
-    summary_width = table_width * 0.28
-    account_width = table_width * 0.42
-    amount_width = (table_width - summary_width - account_width) / 2
+    table_top = y + layout.table_top
+    table_bottom = y + layout.table_bottom
+    summary_x = x + layout.summary_text_x
+    account_x = x + layout.account_text_x
+    debit_x = x + layout.debit_right_x
+    credit_x = x + layout.credit_right_x
 
     c.setFont("Helvetica-Bold", 10)
-    c.rect(table_left, table_top - 3 * line_height - 6, table_width, 3 * line_height + 6, stroke=1, fill=0)
+    c.rect(x + layout.left_x, table_bottom, layout.table_width, layout.table_top - layout.table_bottom, stroke=1, fill=0)
 
-    # Column separators
-    c.line(table_left + summary_width, table_top - 3 * line_height - 6, table_left + summary_width, table_top + 6)
-    c.line(table_left + summary_width + account_width, table_top - 3 * line_height - 6, table_left + summary_width + account_width, table_top + 6)
-    c.line(table_left + summary_width + account_width + amount_width, table_top - 3 * line_height - 6, table_left + summary_width + account_width + amount_width, table_top + 6)
+    # Column separators, stroked as a single path
+    separator_top = y + layout.separator_top
+    c.lines([(x + sx, table_bottom, x + sx, separator_top) for sx in layout.separator_xs])
 
-    c.drawString(table_left + 4, table_top, "摘要")
-    c.drawString(table_left + summary_width + 4, table_top, "科目")
-    c.drawRightString(table_left + summary_width + account_width + amount_width - 4, table_top, "借方金额")
-    c.drawRightString(table_left + summary_width + account_width + 2 * amount_width - 4, table_top, "贷方金额")
+    c.drawString(summary_x, table_top, "摘要")
+    c.drawString(account_x, table_top, "科目")
+    c.drawRightString(debit_x, table_top, "借方金额")
+    c.drawRightString(credit_x, table_top, "贷方金额")
 
     c.setFont("Helvetica", 10)
     # Debit row
-    debit_y = table_top - line_height
-    c.drawString(table_left + 4, debit_y, voucher.description)
-    c.drawString(table_left + summary_width + 4, debit_y, voucher.debit_account)
-    c.drawRightString(table_left + summary_width + account_width + amount_width - 4, debit_y, voucher.formatted_amount)
+    debit_y = y + layout.debit_y
+    c.drawString(summary_x, debit_y, batch.descriptions[i])
+    c.drawString(account_x, debit_y, batch.debit_accounts[i])
+    c.drawRightString(debit_x, debit_y, formatted_amount)
 
     # Credit row
-    credit_y = debit_y - line_height
-    c.drawString(table_left + summary_width + 4, credit_y, voucher.credit_account)
-    c.drawRightString(table_left + summary_width + account_width + 2 * amount_width - 4, credit_y, voucher.formatted_amount)
+    credit_y = y + layout.credit_y
+    c.drawString(account_x, credit_y, batch.credit_accounts[i])
+    c.drawRightString(credit_x, credit_y, formatted_amount)
 
     # Total row
-    total_y = credit_y - line_height
-    c.drawString(table_left + 4, total_y, "合计")
-    c.drawRightString(table_left + summary_width + account_width + amount_width - 4, total_y, voucher.formatted_amount)
+    total_y = y + layout.total_y
+    c.drawString(summary_x, total_y, "合计")
+    c.drawRightString(debit_x, total_y, formatted_amount)
 
     # Footer signatures
-    footer_y = y + padding + 4
+    footer_y = y + layout.footer_y
     c.setFont("Helvetica", 9)
-    positions = ["制单", "记账", "审核", "出纳", "复核"]
-    spacing = table_width / len(positions)
-    for i, label in enumerate(positions):
-        c.drawString(table_left + spacing * i, footer_y, f"{label}：__________")
+    for footer_x, label in zip(layout.footer_xs, SIGNATURE_LABELS):
+        c.drawString(x + footer_x, footer_y, f"{label}：__________")
 
 
-def render_vouchers_to_pdf(vouchers: List[Voucher], output_path: str, vouchers_per_page: int, config: dict):
-    output_dir = os.path.dirname(output_path) or "."
-    os.makedirs(output_dir, exist_ok=True)
-
+def _render_pages(batch: VoucherBatch, output_path: str, vouchers_per_page: int, config: dict):
     page_width, page_height = A4
-    margin = mm_to_pt(config.get("margin_mm", 15))
-    spacing = mm_to_pt(config.get("spacing_mm", 8))
+    margin = mm_to_pt(config.get("margin_mm", DEFAULT_MARGIN_MM))
+    spacing = mm_to_pt(config.get("spacing_mm", DEFAULT_SPACING_MM))
 
     c = canvas.Canvas(output_path, pagesize=A4)
 
@@ -245,13 +630,14 @@ def render_vouchers_to_pdf(vouchers: List[Voucher], output_path: str, vouchers_p
         page_height - 2 * margin - spacing * (vouchers_per_page - 1)
     ) / vouchers_per_page
     voucher_width = page_width - 2 * margin
+    layout = _VoucherLayout.for_size(voucher_width, voucher_height)
 
     x = margin
     y = page_height - margin - voucher_height
 
-    for idx, voucher in enumerate(vouchers):
-        draw_voucher(c, voucher, x, y, voucher_width, voucher_height, config)
-        if (idx + 1) % vouchers_per_page == 0 and idx + 1 != len(vouchers):
+    for idx in range(len(batch)):
+        draw_voucher(c, batch, idx, x, y, layout, config)
+        if (idx + 1) % vouchers_per_page == 0 and idx + 1 != len(batch):
             c.showPage()
             y = page_height - margin - voucher_height
         else:
@@ -260,17 +646,102 @@ def render_vouchers_to_pdf(vouchers: List[Voucher], output_path: str, vouchers_p
     c.save()
 
 
-def render_single_vouchers(vouchers: List[Voucher], output_dir: str, config: dict):
+# Each render worker gets at least this many pages; smaller jobs are cheaper to render serially than to fork and merge.
+MIN_PAGES_PER_WORKER = 10
+
+
+def render_vouchers_to_pdf(batch: VoucherBatch, output_path: str, vouchers_per_page: int, config: dict):
+    output_dir = os.path.dirname(output_path) or "."
     os.makedirs(output_dir, exist_ok=True)
-    for voucher in vouchers:
-        path = os.path.join(output_dir, f"voucher_{voucher.number}.pdf")
+
+    pages = -(-len(batch) // vouchers_per_page)
+    processes = min(os.cpu_count() or 1, pages // MIN_PAGES_PER_WORKER)
+    try:
+        from pypdf import PdfWriter
+    except ImportError:  # optional: render on a single core
+        processes = 1
+    if processes <= 1:
+        _render_pages(batch, output_path, vouchers_per_page, config)
+        return
+
+    # Render page-aligned chunks in separate processes, then concatenate the finished pages.
+    chunk_size = -(-pages // processes) * vouchers_per_page
+    chunks = [batch[start:start + chunk_size] for start in range(0, len(batch), chunk_size)]
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        part_paths = [os.path.join(tmp_dir, f"part_{i:03d}.pdf") for i in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(
+                _render_pages, chunks, part_paths, [vouchers_per_page] * len(chunks), [config] * len(chunks)
+            ))
+        writer = PdfWriter()
+        for part_path in part_paths:
+            writer.append(part_path)
+        with open(output_path, "wb") as f:
+            writer.write(f)
+
+
+# Each single-voucher worker gets at least this many files; a voucher renders in a few milliseconds,
+# so smaller statements finish faster serially than it takes to start the pool.
+MIN_VOUCHERS_PER_WORKER = 25
+
+# Per-process render settings for single-voucher workers, filled by _init_single_worker.
+_SINGLE_WORKER_STATE: dict = {}
+
+
+def _full_page_layout(config: dict) -> Tuple[float, float, _VoucherLayout]:
+    """Origin and layout for a voucher filling one A4 page inside the configured margin."""
+    width, height = A4
+    margin = mm_to_pt(config.get("margin_mm", DEFAULT_MARGIN_MM))
+    layout = _VoucherLayout.for_size(width - 2 * margin, height - 2 * margin)
+    return margin, height - margin - layout.height, layout
+
+
+def _init_single_worker(output_dir: str, config: dict):
+    x, y, layout = _full_page_layout(config)
+    _SINGLE_WORKER_STATE.update(output_dir=output_dir, config=config, x=x, y=y, layout=layout)
+
+
+def _render_chunk(batch: VoucherBatch) -> int:
+    state = _SINGLE_WORKER_STATE
+    for i in range(len(batch)):
+        path = os.path.join(state["output_dir"], f"voucher_{batch.numbers[i]}.pdf")
         c = canvas.Canvas(path, pagesize=A4)
-        width, height = A4
-        margin = mm_to_pt(config.get("margin_mm", 15))
-        voucher_width = width - 2 * margin
-        voucher_height = height - 2 * margin
-        draw_voucher(c, voucher, margin, height - margin - voucher_height, voucher_width, voucher_height, config)
+        draw_voucher(c, batch, i, state["x"], state["y"], state["layout"], state["config"])
         c.save()
+    return len(batch)
+
+
+def render_single_vouchers(batch: VoucherBatch, output_dir: str, config: dict):
+    """Write one PDF per voucher. Every file pays the PDF writer setup again; prefer
+    render_single_vouchers_multipage unless separate files are required."""
+    os.makedirs(output_dir, exist_ok=True)
+    processes = min(os.cpu_count() or 1, len(batch) // MIN_VOUCHERS_PER_WORKER)
+    if processes <= 1:
+        _init_single_worker(output_dir, config)
+        _render_chunk(batch)
+        return
+
+    # Each file is an independent ReportLab render, so spread them over processes to sidestep the GIL.
+    # Workers receive column slices of the batch, which pickle as a handful of arrays.
+    chunksize = max(1, len(batch) // (4 * processes))
+    chunks = [batch[start:start + chunksize] for start in range(0, len(batch), chunksize)]
+    with multiprocessing.Pool(processes, initializer=_init_single_worker, initargs=(output_dir, config)) as pool:
+        for _ in pool.imap_unordered(_render_chunk, chunks):
+            pass
+
+
+def render_single_vouchers_multipage(batch: VoucherBatch, output_path: str, config: dict):
+    """Write every voucher full-page into a single PDF, one page each, sharing one canvas."""
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+
+    x, y, layout = _full_page_layout(config)
+    c = canvas.Canvas(output_path, pagesize=A4)
+    for idx in range(len(batch)):
+        if idx:
+            c.showPage()
+        draw_voucher(c, batch, idx, x, y, layout, config)
+    c.save()
 
 
 def build_argument_parser() -> argparse.ArgumentParser:
@@ -280,8 +751,10 @@ def build_argument_parser() -> argparse.ArgumentParser:
     parser.add_argument("--mapping", default="mapping.yaml", help="摘要到科目的映射文件")
     parser.add_argument("--config", default="config.yaml", help="基础配置文件")
     parser.add_argument("--single", action="store_true", help="同时生成单张凭证 PDF")
+    parser.add_argument("--single-multipage", action="store_true", help="单张凭证合并为一个每页一张的 PDF（隐含 --single）")
     parser.add_argument("--start-number", type=int, help="凭证号起始编号（覆盖配置）")
     parser.add_argument("--vouchers-per-page", type=int, choices=[2, 3], help="每页几张凭证（覆盖配置）")
+    parser.add_argument("--use-pandas", action="store_true", help="用 pandas 解析 CSV（大文件更快，启动更慢）")
     return parser
 
 
@@ -298,9 +771,11 @@ def main(argv: Optional[List[str]] = None):
 
     fallback_debit = config.get("fallback_debit_account", "")
     fallback_credit = config.get("fallback_credit_account", "")
+    rules = compile_mapping_rules(mapping_rules, fallback_debit, fallback_credit)
 
-    df = parse_csv(args.input, filter_zero=filter_zero)
-    vouchers = build_vouchers(df, mapping_rules, start_number, fallback_debit, fallback_credit)
+    read_statement = parse_csv_pandas if args.use_pandas else parse_csv
+    table = read_statement(args.input, filter_zero=filter_zero)
+    vouchers = build_vouchers(table, rules, start_number, fallback_debit, fallback_credit)
 
     if not vouchers:
         print("没有需要生成的凭证，检查 CSV 内容或过滤规则。")
@@ -309,10 +784,15 @@ def main(argv: Optional[List[str]] = None):
     render_vouchers_to_pdf(vouchers, args.output, vouchers_per_page, config)
     print(f"已生成汇总 PDF：{args.output}")
 
-    if args.single:
+    if args.single or args.single_multipage:
         output_dir = os.path.join(os.path.dirname(args.output), "single")
-        render_single_vouchers(vouchers, output_dir, config)
-        print(f"已生成单张凭证 PDF 至：{output_dir}")
+        if args.single_multipage:
+            single_path = os.path.join(output_dir, "vouchers_single.pdf")
+            render_single_vouchers_multipage(vouchers, single_path, config)
+            print(f"已生成单张凭证 PDF：{single_path}")
+        else:
+            render_single_vouchers(vouchers, output_dir, config)
+            print(f"已生成单张凭证 PDF 至：{output_dir}")
 
 
 if __name__ == "__main__":